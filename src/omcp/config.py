@@ -1,5 +1,8 @@
 import os
+import atexit
+import queue
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from dotenv import load_dotenv
 from langfuse import Langfuse
@@ -19,9 +22,18 @@ ENABLE_LANGFUSE = os.environ.get("ENABLE_LANGFUSE", "true").lower() == "true"
 
 
 def setup_logging():
-    """Set up simplified logging configuration."""
+    """
+    Set up simplified logging configuration.
+
+    Records are handed to a QueueHandler and written to the file/console
+    handlers by a background QueueListener, so tool calls never block on
+    log I/O. Calling this again on an already configured logger is a no-op.
+    """
     logger = logging.getLogger("omcp")
 
+    if getattr(logger, "_omcp_configured", False):
+        return logger
+
     if not ENABLE_LOGGING:
         logger.addHandler(logging.NullHandler())
         return logger
@@ -44,7 +56,7 @@ def setup_logging():
         file_handler.setFormatter(
             logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
         )
-        logger.addHandler(file_handler)
+        handlers = [file_handler]
 
         # Console handler for development
         if os.environ.get("DEBUG", "false").lower() == "true":
@@ -52,7 +64,14 @@ def setup_logging():
             console_handler.setFormatter(
                 logging.Formatter("%(levelname)s - %(message)s")
             )
-            logger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+        # Write records on a background thread; flush remaining ones at exit
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(QueueHandler(log_queue))
 
         logger.info(f"Logging initialized - file: {log_file}")
 
@@ -62,6 +81,7 @@ def setup_logging():
         logger.addHandler(console_handler)
         logger.warning(f"Could not create log file, using console: {e}")
 
+    logger._omcp_configured = True
     return logger
 
 
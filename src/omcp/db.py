@@ -1,37 +1,271 @@
+import gzip
+import hashlib
+import importlib.util
+import io
+import os
+import re
+from pathlib import Path
+
+import duckdb
 import ibis
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import sqlglot as sg
+import sqlglot.expressions as exp
 from ibis.backends import BaseBackend
 
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple
 import omcp.exceptions as ex
+from omcp.utils import LRUCache
 
+from contextlib import contextmanager
 from functools import lru_cache
+import random
 import threading
 import time
 import logging
 from urllib.parse import urlparse, parse_qs
 
-# Import databricks conditionally (only if needed)
-try:
-    import databricks.sql as databricks_sql
-    from ibis.backends.databricks import Backend as DatabricksBackend
+from omcp.sql_validator import SQLValidator
+from omcp.transpiler import transpile_query
 
-    DATABRICKS_AVAILABLE = True
-except ImportError:
-    databricks_sql = None
-    DatabricksBackend = None
+# The databricks connector is imported on first connect, as loading it is
+# slow and most deployments never use it. databricks is a namespace package
+# shared with e.g. databricks-sdk, so the SQL connector itself is looked up
+try:
+    DATABRICKS_AVAILABLE = importlib.util.find_spec("databricks.sql") is not None
+except ModuleNotFoundError:
     DATABRICKS_AVAILABLE = False
 
-from omcp.sql_validator import SQLValidator
-from omcp.transpiler import transpile_query
+# Errors that may mean the connection itself failed rather than the query.
+# OmopDatabase._is_connection_lost narrows these down to real connection
+# loss, which is retried on another connection
+TRANSIENT_ERRORS: Tuple[type, ...] = (OSError, duckdb.ConnectionException)
+try:
+    import psycopg
+
+    TRANSIENT_ERRORS += (psycopg.OperationalError,)
+except ImportError:
+    pass
 
 logger = logging.getLogger(__name__)
 
+# Secret query parameters such as the Databricks access_token
+_SECRET_PARAM_PATTERN = re.compile(
+    r"((?:access_token|password|token)=)[^&#]*", re.IGNORECASE
+)
+
+
+def _redact_connection_string(connection_string: str) -> str:
+    """
+    Mask the password and access tokens in a connection string for logging.
+
+    The password is not URL-quoted when the server builds the connection
+    string, so it may contain @, / or ?. Everything between the user name
+    and the last @ is therefore masked.
+
+    Args:
+        connection_string: Database connection string
+
+    Returns:
+        The connection string with every secret replaced by ***
+    """
+    scheme, separator, rest = connection_string.partition("://")
+    credentials, at, host = rest.rpartition("@")
+    user, colon, _ = credentials.partition(":")
+    if separator and at and colon and not any(c in user for c in "/?#"):
+        rest = f"{user}:***@{host}"
+    return _SECRET_PARAM_PATTERN.sub(r"\1***", f"{scheme}{separator}{rest}")
+
+
+@lru_cache(maxsize=512)
+def _apply_row_limit(query: str, dialect: str, row_limit: int) -> str:
+    """
+    Rewrite a query so that at most row_limit rows are returned.
+
+    A plain SELECT gets the limit on its own LIMIT clause, keeping the lower
+    of its existing limit and row_limit. Any other query, such as a set
+    operation, is wrapped as a subquery so that its LIMIT and ORDER BY are
+    kept. LIMIT ALL is treated as no limit. Results are cached, so repeated
+    queries are not parsed and regenerated again.
+
+    Args:
+        query: SQL query in the given dialect
+        dialect: sqlglot dialect of the query
+        row_limit: Maximum number of rows to return
+
+    Returns:
+        SQL query in the given dialect with the row limit applied
+    """
+    parsed = sg.parse_one(query, read=dialect)
+    # LIMIT ALL is parsed as a column named all, which is written back as
+    # LIMIT "all". It means no limit, so the clause is dropped
+    for limit in list(parsed.find_all(exp.Limit)):
+        if (
+            isinstance(limit.expression, exp.Column)
+            and limit.expression.name.lower() == "all"
+        ):
+            limit.pop()
+    if isinstance(parsed, exp.Select):
+        limit = parsed.args.get("limit")
+        if limit is None:
+            return parsed.limit(row_limit).sql(dialect=dialect)
+        if isinstance(limit, exp.Limit) and limit.expression.is_int:
+            if limit.expression.to_py() <= row_limit:
+                return parsed.sql(dialect=dialect)
+            return parsed.limit(row_limit).sql(dialect=dialect)
+    limited = sg.select("*").from_(parsed.subquery("t")).limit(row_limit)
+    return limited.sql(dialect=dialect)
+
+
+@lru_cache(maxsize=1024)
+def _canonical_query(query: str, dialect: str = "postgres") -> str:
+    """
+    Normalise the formatting of a query for use as a cache key.
+
+    Queries are regenerated from their sqlglot AST, so differences in
+    whitespace, keyword case and comments map to the same key. Identifiers and
+    literals are kept as written, as quoted identifiers are case sensitive.
+
+    Args:
+        query: SQL query in the given dialect
+        dialect: sqlglot dialect of the query
+
+    Returns:
+        The canonical SQL, or the query unchanged if it cannot be parsed
+    """
+    try:
+        return "; ".join(
+            sg.transpile(query, read=dialect, write=dialect, comments=False)
+        )
+    except sg.errors.SqlglotError:
+        return query
+
+
+def _needs_csv_formatting(data_type: pa.DataType) -> bool:
+    """
+    Check if a column of this type must be formatted before writing to CSV.
+
+    The Arrow CSV writer rejects nested and interval columns, and fails on
+    binary values that are not valid UTF-8.
+    """
+    return (
+        pa.types.is_nested(data_type)
+        or pa.types.is_interval(data_type)
+        or pa.types.is_binary(data_type)
+        or pa.types.is_large_binary(data_type)
+        or pa.types.is_fixed_size_binary(data_type)
+    )
+
+
+def _format_interval(value: pa.MonthDayNano) -> str:
+    """Format an interval the way DuckDB prints it, e.g. 1 year 2 days 01:30:00."""
+    # Split toward zero, so -14 months is -1 year -2 months as in DuckDB
+    years, months = divmod(abs(value.months), 12)
+    if value.months < 0:
+        years, months = -years, -months
+    parts = [
+        f"{count} {unit}{'' if abs(count) == 1 else 's'}"
+        for count, unit in ((years, "year"), (months, "month"), (value.days, "day"))
+        if count
+    ]
+    if value.nanoseconds or not parts:
+        sign = "-" if value.nanoseconds < 0 else ""
+        seconds, nanos = divmod(abs(value.nanoseconds), 1_000_000_000)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        clock = f"{sign}{hours:02d}:{minutes:02d}:{seconds:02d}"
+        if nanos // 1000:
+            clock += f".{nanos // 1000:06d}".rstrip("0")
+        parts.append(clock)
+    return " ".join(parts)
+
+
+def _format_csv_column(column: pa.Array) -> pa.Array:
+    """Format a column the CSV writer cannot write as Python-style strings."""
+    is_map = pa.types.is_map(column.type)
+    if pa.types.is_struct(column.type) and len(set(column.type.names)) < len(
+        column.type.names
+    ):
+        # Unnamed ROW(...) values have duplicate empty field names, which
+        # to_pylist cannot turn into dicts, so they are written as tuples
+        rows = zip(*(field.to_pylist() for field in column.flatten()))
+        pylist = [
+            row if valid else None
+            for row, valid in zip(rows, column.is_valid().to_pylist())
+        ]
+    else:
+        pylist = column.to_pylist()
+    values = []
+    for value in pylist:
+        if value is None:
+            values.append(None)
+        elif isinstance(value, pa.MonthDayNano):
+            values.append(_format_interval(value))
+        else:
+            # Maps come back as lists of key/value tuples
+            values.append(str(dict(value) if is_map else value))
+    return pa.array(values, type=pa.string())
+
+
+def _csv_schema(schema: pa.Schema) -> pa.Schema:
+    """
+    Return the schema a result is written to CSV with.
+
+    Nested and interval columns, which the Arrow CSV writer rejects, become
+    string columns.
+    """
+    for i, field in enumerate(schema):
+        if _needs_csv_formatting(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema
+
+
+def _to_csv_batch(batch: pa.RecordBatch, schema: pa.Schema) -> pa.RecordBatch:
+    """
+    Convert a batch to the schema returned by _csv_schema.
+
+    Nested and binary values are written as their Python representation, e.g.
+    [1, 2], {'a': 1} or b'\\xaa', as pandas did before results were written
+    with Arrow, and intervals as DuckDB prints them.
+    """
+    if batch.schema.equals(schema):
+        return batch
+    columns = [
+        _format_csv_column(column) if _needs_csv_formatting(column.type) else column
+        for column in batch.columns
+    ]
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
 
 class OmopDatabase:
     """
     A class for interacting with an OMOP database using the Ibis framework.
     """
 
+    # Connection string prefixes, as a tuple so it can be passed to startswith
+    supported_databases = (
+        "duckdb",
+        "postgres",
+        "databricks",
+        # 'mssql',
+        # 'mysql',
+        # 'sqlite',
+        # 'clickhouse',
+        # 'bigquery',
+        # 'snowflake',
+        # 'impala',
+        # 'oracle'
+    )
+
+    # SQL dialect for each connection string scheme
+    dialects = {
+        "databricks": "databricks",
+        "postgres": "postgres",
+        "postgresql": "postgres",
+        "duckdb": "duckdb",
+    }
+
     def __init__(
         self,
         connection_string: str,
@@ -40,6 +274,10 @@ class OmopDatabase:
         vocab_schema: str = "vocab",
         allow_source_value_columns: bool = False,
         allowed_tables: Optional[List[str]] = None,
+        query_timeout: Optional[float] = None,
+        cache_dir: Optional[str] = None,
+        pool_size: int = 1,
+        cache_ttl: Optional[float] = None,
     ):
         """
         Initialize the database connection.
@@ -49,31 +287,45 @@ class OmopDatabase:
             read_only: Flag to set the connection as read-only
             allow_source_values: Flag to allow source values
             allowed_tables: List of allowed tables for queries
+            query_timeout: Maximum seconds a query may run before it is
+                interrupted (None or 0 disables the limit)
+            cache_dir: Directory for a persistent cache of query results that
+                survives restarts (None disables it)
+            pool_size: Maximum number of connections used for concurrent queries
+            cache_ttl: Seconds after which a cached query result expires, in
+                memory and on disk (None keeps results until they are evicted)
         """
 
-        # Thread-safe connection handling
+        # Thread-safe connection pool: the lock guards the idle connections and
+        # the semaphore bounds how many connections are in use at once
         self._conn_lock = threading.RLock()
-        self._conn = None
-        self._last_connect_time = 0
-        self._connect_retry_delay = 1.0  # Start with 1 second retry
+        # Idle connections with the monotonic time they were last used
+        self._idle_conns: List[Tuple[BaseBackend, float]] = []
+        # DuckDB database that pooled DuckDB connections are cursors of
+        self._duckdb_root: Optional[BaseBackend] = None
+        self._information_schema_lock = threading.Lock()
+        self._last_connect_time = 0.0  # time.monotonic() of the last connect
+        # Information schema rows, and the CSV and dict built from them
+        self._information_schema_table: Optional[pa.Table] = None
+        self._information_schema: Optional[str] = None
+        self._information_schema_dict: Optional[Dict[str, List[Tuple[str, str]]]] = None
+        # Recent query results, kept per instance so they are released with it
+        self._query_cache = LRUCache(maxsize=128, ttl=cache_ttl)
+        # Extended with driver errors by connectors imported on first use
+        self._transient_errors = TRANSIENT_ERRORS
 
         self.conn: BaseBackend | Any = None  # Keep for backwards compatibility
-        self.supported_databases = [
-            "duckdb",
-            "postgres",
-            "databricks",
-            # 'mssql',
-            # 'mysql',
-            # 'sqlite',
-            # 'clickhouse',
-            # 'bigquery',
-            # 'snowflake',
-            # 'impala',
-            # 'oracle'
-        ]
         self.connection_string = connection_string
         self.read_only = read_only
         self.row_limit = 1000  # Default row limit for queries
+        self.batch_size = 10_000  # Rows per Arrow batch when streaming results
+        # Idle connections used within this many seconds skip the SELECT 1 probe
+        self.health_check_interval = 30.0
+        self.query_timeout = query_timeout
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_ttl = cache_ttl
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.allowed_tables = allowed_tables or [
             "care_site",
             # "cdm_source",
@@ -128,76 +380,232 @@ class OmopDatabase:
             connection_string
         )
 
+        self.pool_size = max(1, pool_size)
+        self._pool_slots = threading.BoundedSemaphore(self.pool_size)
+
         # Try initial connection
-        logger.info(f"Initializing connection to: {connection_string}")
+        logger.info(
+            "Initializing connection to: %s",
+            _redact_connection_string(connection_string),
+        )
         try:
             # Check if the connection string starts with a supported prefix
-            if not connection_string.startswith(tuple(self.supported_databases)):
+            if not connection_string.startswith(self.supported_databases):
                 raise ValueError(
-                    f"Unsupported database type in connection string: {connection_string}. Supported types are: {', '.join(self.supported_databases)}"
+                    f"Unsupported database type in connection string: {_redact_connection_string(connection_string)}. Supported types are: {', '.join(self.supported_databases)}"
                 )
-            self._ensure_connected()
-            # Set backwards compatible conn attribute
-            self.conn = self._conn
+            # Open the first pooled connection to check the database is reachable
+            with self._connection():
+                pass
         except Exception as e:
-            raise ConnectionError(f"Failed to connect to database: {str(e)}")
+            raise ConnectionError(f"Failed to connect to database: {str(e)}") from e
 
     def _get_dialect_from_connection_string(self, connection_string: str) -> str:
         """
         Determine the SQL dialect from the connection string.
 
+        This runs once in __init__, and the result is kept as target_dialect.
+
         Args:
             connection_string: Database connection string
 
         Returns:
             SQL dialect name (e.g., 'databricks', 'postgres', 'duckdb')
         """
-        if connection_string.startswith("databricks://"):
-            return "databricks"
-        elif connection_string.startswith("postgres"):
-            return "postgres"
-        elif connection_string.startswith("duckdb://"):
-            return "duckdb"
-        else:
+        scheme = connection_string.partition("://")[0]
+        dialect = self.dialects.get(scheme.lower())
+        if dialect is None:
             # Default to postgres for unknown dialects
             logger.warning(
-                f"Unknown dialect for connection string: {connection_string}, defaulting to postgres"
+                f"Unknown dialect for connection string: {_redact_connection_string(connection_string)}, defaulting to postgres"
             )
             return "postgres"
+        return dialect
+
+    @contextmanager
+    def _connection(self) -> Iterator[BaseBackend]:
+        """
+        Borrow a database connection from the pool.
+
+        At most pool_size connections are in use at once, and further callers
+        wait for one to be returned. A connection that failed or whose query
+        was interrupted is closed rather than returned to the pool. After any
+        other error, or a streamed result closed early, it is returned but
+        checked with SELECT 1 before reuse.
 
-    def _ensure_connected(self):
-        """Ensure we have a valid database connection."""
+        Yields:
+            An open ibis backend connection
+        """
+        with self._pool_slots:
+            conn = self._checkout_connection()
+            try:
+                yield conn
+            except Exception as e:
+                if isinstance(e, ex.QueryTimeoutError) or self._is_connection_lost(
+                    e, conn
+                ):
+                    self._close_connection(conn)
+                else:
+                    # Never used recently, so the next checkout probes it
+                    with self._conn_lock:
+                        self._idle_conns.append((conn, float("-inf")))
+                raise
+            except GeneratorExit:
+                # A streaming caller stopped early, after closing its result.
+                # Return the connection, but probe it before reuse
+                with self._conn_lock:
+                    self._idle_conns.append((conn, float("-inf")))
+                raise
+            except BaseException:
+                self._close_connection(conn)
+                raise
+            with self._conn_lock:
+                self._idle_conns.append((conn, time.monotonic()))
+
+    def _checkout_connection(self) -> BaseBackend:
+        """Take a healthy idle connection from the pool, or open a new one."""
         with self._conn_lock:
-            # Check if we need to reconnect
-            if self._conn is None or not self._is_connection_alive():
-                self._reconnect()
-            # Update backwards compatible conn attribute
-            self.conn = self._conn
-
-    def _is_connection_alive(self) -> bool:
-        """Check if the current connection is still alive."""
-        if self._conn is None:
+            conn, last_used = self._idle_conns.pop() if self._idle_conns else (None, 0)
+
+        if conn is not None:
+            idle_time = time.monotonic() - last_used
+            if not self._is_connection_alive(
+                conn, probe=idle_time > self.health_check_interval
+            ):
+                self._close_connection(conn)
+                conn = None
+
+        return conn if conn is not None else self._open_connection()
+
+    def _is_connection_alive(self, conn: BaseBackend, probe: bool = True) -> bool:
+        """
+        Check if a connection is still alive.
+
+        The driver's own closed flag is checked first, which costs no round
+        trip. A SELECT 1 query is only sent when probe is set, so connections
+        that were used recently are not checked against the server again.
+
+        Args:
+            conn: Connection to check
+            probe: Whether to send a query to the server
+
+        Returns:
+            True if the connection can be used
+        """
+        raw_conn = getattr(conn, "con", None)
+        # psycopg exposes closed, the Databricks connector exposes open
+        if getattr(raw_conn, "closed", False) or not getattr(raw_conn, "open", True):
             return False
+        if not probe:
+            return True
 
         try:
             # Try a simple query
-            self._conn.sql("SELECT 1").limit(1).execute()
+            conn.sql("SELECT 1").to_pyarrow()
             return True
         except Exception as e:
             logger.warning(f"Connection health check failed: {e}")
             return False
 
-    def _reconnect(self):
-        """Reconnect to the database with retry logic."""
-        # Clean up old connection
-        if self._conn:
-            try:
-                self._conn.disconnect()
-            except Exception as disconnect_error:
-                logger.warning(
-                    f"Error disconnecting previous connection: {disconnect_error}"
-                )
-            self._conn = None
+    def _close_connection(self, conn: BaseBackend):
+        """Disconnect a connection that is leaving the pool."""
+        try:
+            conn.disconnect()
+        except Exception as disconnect_error:
+            logger.warning(f"Error disconnecting connection: {disconnect_error}")
+
+    def _connect_duckdb(self) -> BaseBackend:
+        """
+        Open a pooled DuckDB connection as a cursor of one shared database.
+
+        The database is opened once, and every pooled connection is a cursor on
+        it. Cursors share the database instance with its catalog and buffer
+        cache, and see the same data even for an in-memory database.
+        """
+        with self._conn_lock:
+            if self._duckdb_root is None:
+                self._duckdb_root = self._open_duckdb()
+            root = self._duckdb_root
+
+        try:
+            cursor = root.con.cursor()
+        except duckdb.ConnectionException:
+            # The database was closed, so the next attempt opens it again
+            with self._conn_lock:
+                if self._duckdb_root is root:
+                    self._duckdb_root = None
+            raise
+        return ibis.duckdb.from_connection(cursor)
+
+    def _open_duckdb(self) -> BaseBackend:
+        """Open the DuckDB database, in read-only mode if requested."""
+        # Special handling for DuckDB to avoid locks
+        if self.read_only and "?access_mode=read_only" not in self.connection_string:
+            # Add read-only parameter if not already present
+            connection_url = f"{self.connection_string}?access_mode=read_only"
+            logger.info("Using DuckDB read-only mode to prevent file locking")
+        else:
+            connection_url = self.connection_string
+        # A read-only server only ever needs the database file itself, so
+        # refuse file access from SQL such as read_csv('/etc/passwd')
+        config = {"enable_external_access": False} if self.read_only else {}
+        return ibis.connect(connection_url, **config)
+
+    def _connect_databricks(self) -> BaseBackend:
+        """Connect to Databricks without requiring CREATE VOLUME permissions."""
+        # Special handling for Databricks Unity Catalog without CREATE VOLUME permissions
+        # Ibis attempts to create volumes during connection initialization, which requires
+        # CREATE VOLUME permissions. This workaround bypasses that requirement by:
+        # 1. Creating a raw databricks-sql connection (which works without volumes)
+        # 2. Temporarily patching ibis's _post_connect to skip volume creation
+        # 3. Wrapping the raw connection with ibis for compatibility
+
+        import databricks.sql as databricks_sql
+        from ibis.backends.databricks import Backend as DatabricksBackend
+
+        self._transient_errors = TRANSIENT_ERRORS + (databricks_sql.OperationalError,)
+
+        parsed = urlparse(self.connection_string)
+        params = parse_qs(parsed.query)
+
+        server_hostname = params.get("server_hostname", [None])[0]
+        http_path = params.get("http_path", [None])[0]
+        access_token = params.get("access_token", [None])[0]
+        catalog = params.get("catalog", ["hive_metastore"])[0]
+        schema = params.get("schema", ["default"])[0]
+
+        logger.info(
+            f"Connecting to Databricks at {server_hostname}, catalog={catalog}, schema={schema}"
+        )
+
+        raw_conn = databricks_sql.connect(
+            server_hostname=server_hostname,
+            http_path=http_path,
+            access_token=access_token,
+            catalog=catalog,
+            schema=schema,
+        )
+
+        # Temporarily disable volume creation during connection
+        original_post_connect = DatabricksBackend._post_connect
+        DatabricksBackend._post_connect = lambda self, memtable_volume=None: None
+
+        try:
+            return ibis.databricks.from_connection(raw_conn)
+        finally:
+            DatabricksBackend._post_connect = original_post_connect
+
+    def _connect_generic(self) -> BaseBackend:
+        """Connect to any other supported backend through ibis."""
+        return ibis.connect(self.connection_string)
+
+    def _open_connection(self) -> BaseBackend:
+        """Open a new database connection with retry logic."""
+        # Backend-specific connect method, looked up once per connection
+        connect = {
+            "duckdb": self._connect_duckdb,
+            "databricks": self._connect_databricks,
+        }.get(self.target_dialect, self._connect_generic)
 
         # Retry connection with backoff
         max_retries = 3
@@ -207,118 +615,154 @@ class OmopDatabase:
                     f"Connecting to database (attempt {attempt + 1}/{max_retries})..."
                 )
 
-                if not self.connection_string.startswith(
-                    tuple(self.supported_databases)
-                ):
-                    raise ValueError(
-                        f"Unsupported database type. Supported: {', '.join(self.supported_databases)}"
-                    )
-
-                # Special handling for DuckDB to avoid locks
-                if self.connection_string.startswith("duckdb://"):
-                    if (
-                        self.read_only
-                        and "?access_mode=read_only" not in self.connection_string
-                    ):
-                        # Add read-only parameter if not already present
-                        connection_url = (
-                            f"{self.connection_string}?access_mode=read_only"
-                        )
-                        logger.info(
-                            "Using DuckDB read-only mode to prevent file locking"
-                        )
-                    else:
-                        connection_url = self.connection_string
-                    self._conn = ibis.connect(connection_url)
-                elif self.connection_string.startswith("databricks://"):
-                    # Special handling for Databricks Unity Catalog without CREATE VOLUME permissions
-                    # Ibis attempts to create volumes during connection initialization, which requires
-                    # CREATE VOLUME permissions. This workaround bypasses that requirement by:
-                    # 1. Creating a raw databricks-sql connection (which works without volumes)
-                    # 2. Temporarily patching ibis's _post_connect to skip volume creation
-                    # 3. Wrapping the raw connection with ibis for compatibility
-
-                    parsed = urlparse(self.connection_string)
-                    params = parse_qs(parsed.query)
-
-                    server_hostname = params.get("server_hostname", [None])[0]
-                    http_path = params.get("http_path", [None])[0]
-                    access_token = params.get("access_token", [None])[0]
-                    catalog = params.get("catalog", ["hive_metastore"])[0]
-                    schema = params.get("schema", ["default"])[0]
-
-                    logger.info(
-                        f"Connecting to Databricks at {server_hostname}, catalog={catalog}, schema={schema}"
-                    )
-
-                    raw_conn = databricks_sql.connect(
-                        server_hostname=server_hostname,
-                        http_path=http_path,
-                        access_token=access_token,
-                        catalog=catalog,
-                        schema=schema,
-                    )
-
-                    # Temporarily disable volume creation during connection
-                    original_post_connect = DatabricksBackend._post_connect
-                    DatabricksBackend._post_connect = (
-                        lambda self, memtable_volume=None: None
-                    )
-
-                    try:
-                        self._conn = ibis.databricks.from_connection(raw_conn)
-                    finally:
-                        DatabricksBackend._post_connect = original_post_connect
-                else:
-                    self._conn = ibis.connect(self.connection_string)
+                conn = connect()
 
                 # Test the connection
-                self._conn.sql("SELECT 1").limit(1).execute()
+                conn.sql("SELECT 1").to_pyarrow()
 
                 logger.info("Database connection established successfully")
-                self._last_connect_time = time.time()
-                self._connect_retry_delay = 1.0  # Reset retry delay
-                return
+                self._last_connect_time = time.monotonic()
+                # Set backwards compatible conn attribute
+                self.conn = conn
+                return conn
 
             except Exception as e:
                 logger.error(f"Connection attempt {attempt + 1} failed: {e}")
                 if attempt < max_retries - 1:
-                    time.sleep(self._connect_retry_delay)
-                    self._connect_retry_delay = min(self._connect_retry_delay * 2, 10)
+                    # Exponential backoff with jitter, so pooled connections
+                    # failing together do not all retry at the same moment
+                    time.sleep(min(2**attempt + random.random(), 10.0))
                 else:
                     raise ConnectionError(
                         f"Failed to connect after {max_retries} attempts: {str(e)}"
+                    ) from e
+
+    def get_information_schema(self) -> str:
+        """
+        Get the information schema of the database.
+
+        The schema does not change while the server runs, so the CSV is built
+        on first use and returned from memory afterwards.
+
+        Returns:
+            CSV string with schema, table, column and data type of each column
+        """
+        information_schema = self._information_schema
+        if information_schema is not None:
+            return information_schema
+
+        # Built under the lock, so a concurrent refresh cannot leave a CSV
+        # of the old rows cached
+        with self._information_schema_lock:
+            if self._information_schema is None:
+                self._information_schema = self._table_to_csv(
+                    self._fetch_information_schema()
+                )
+            return self._information_schema
+
+    def get_information_schema_dict(self) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Get the information schema of the database as a dict.
+
+        Built on first use from the same rows as get_information_schema, and
+        returned from memory afterwards. The dict is shared between callers,
+        so it must not be modified.
+
+        Returns:
+            Dict mapping "schema.table" to its (column, data type) pairs
+        """
+        information_schema_dict = self._information_schema_dict
+        if information_schema_dict is not None:
+            return information_schema_dict
+
+        with self._information_schema_lock:
+            if self._information_schema_dict is None:
+                columns = self._fetch_information_schema().to_pydict()
+                schema: Dict[str, List[Tuple[str, str]]] = {}
+                for table_schema, table_name, column_name, data_type in zip(
+                    columns["table_schema"],
+                    columns["table_name"],
+                    columns["column_name"],
+                    columns["data_type"],
+                ):
+                    schema.setdefault(f"{table_schema}.{table_name}", []).append(
+                        (column_name, data_type)
                     )
+                self._information_schema_dict = schema
+            return self._information_schema_dict
 
-    @lru_cache(maxsize=128)
-    def get_information_schema(self) -> Dict[str, List[str]]:
-        """Get the information schema of the database."""
-        self._ensure_connected()
+    def refresh_information_schema(self):
+        """Discard the cached information schema, e.g. after a migration."""
+        with self._information_schema_lock:
+            self._information_schema_table = None
+            self._information_schema = None
+            self._information_schema_dict = None
+
+    def _fetch_information_schema(self) -> pa.Table:
+        """
+        Query the information schema once and keep the rows on the instance.
+
+        The caller must hold _information_schema_lock, so that the rows and
+        the forms built from them are replaced together.
+
+        Raises:
+            QueryError: If the information schema query fails
+        """
+        if self._information_schema_table is not None:
+            return self._information_schema_table
 
         try:
-            with self._conn_lock:
-                at = ",".join(f"'{i}'" for i in self.allowed_tables)
-                query = f"""
-                select table_schema, table_name, column_name,data_type
-                from information_schema.columns
-                where table_name in ({at})
-                and table_schema in ('{self.cdm_schema}', '{self.vocab_schema}')
-                """
-                # Add filtering for source_value columns if not allowed
-                if not self.allow_source_value_columns:
-                    query += " and lower(column_name) not like '%_source_value%'"
-
-                query += ";"  # Add the semicolon to terminate the SQL query
-                df = self._conn.sql(query).execute()
-                return df.to_csv(index=False)
+            query = self._information_schema_query()
+            with self._connection() as conn:
+                self._information_schema_table = conn.sql(query).to_pyarrow()
+            return self._information_schema_table
 
         except Exception as e:
-            # Clear connection on error
-            self._conn = None
-            self.conn = None
-            raise ex.QueryError(f"Failed to get information schema: {str(e)}")
+            raise ex.QueryError(f"Failed to get information schema: {str(e)}") from e
+
+    def _information_schema_query(self) -> str:
+        """
+        Build the information_schema query for the allowed tables.
+
+        Table and schema names are added as escaped string literals, so a name
+        containing a quote cannot change the query.
+
+        Returns:
+            SQL query in the target dialect
+        """
+        if self.target_dialect == "duckdb":
+            # information_schema.columns is a view joining several catalog
+            # functions, so read the columns from duckdb_columns() directly
+            schema_column = "schema_name"
+            source = sg.func("duckdb_columns")
+        else:
+            schema_column = "table_schema"
+            source = sg.table("columns", db="information_schema")
+
+        condition = sg.and_(
+            sg.column("table_name").isin(*self.allowed_tables),
+            sg.column(schema_column).isin(self.cdm_schema, self.vocab_schema),
+        )
+        # Add filtering for source_value columns if not allowed
+        if not self.allow_source_value_columns:
+            condition = condition.and_(
+                sg.func("lower", sg.column("column_name"))
+                .like("%_source_value%")
+                .not_()
+            )
+
+        query = (
+            sg.select(
+                sg.column(schema_column).as_("table_schema"),
+                "table_name",
+                "column_name",
+                "data_type",
+            )
+            .from_(source)
+            .where(condition)
+        )
+        return query.sql(dialect=self.target_dialect)
 
-    @lru_cache(maxsize=128)
     def read_query(self, query: str) -> str:
         """
         Execute a read-only SQL query and return results as CSV
@@ -329,75 +773,453 @@ class OmopDatabase:
         Returns:
             CSV string representing query results
         """
+        # Formatting variants of the same query share a cache entry, keyed by
+        # a short digest rather than the full query text
+        key = hashlib.blake2b(_canonical_query(query).encode(), digest_size=16).digest()
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            return gzip.decompress(cached).decode("utf-8")
+        result = self._read_query(query)
+        # CSV results compress several times over even at the fastest level,
+        # so the cache holds more results in the same memory
+        self._query_cache[key] = gzip.compress(result.encode("utf-8"), compresslevel=1)
+        return result
 
-        try:
-            # Validate the SQL query first (no DB connection needed)
-            errors = self.sql_validator.validate_sql(query)
-
-            # DoNotDelete: Adding message and exceptions keywords to the exception group
-            # results in `TypeError: BaseExceptionGroup.__new__() takes exactly 2 arguments (0 given)`
-            if errors:
-                raise ExceptionGroup(
-                    "Query validation failed",
-                    errors,
-                )
+    def read_query_arrow(self, query: str) -> bytes:
+        """
+        Execute a read-only SQL query and return results as an Arrow IPC stream
 
-            # Transpile query if needed (postgres -> databricks, etc.)
-            # We assume Claude generates queries in postgres dialect by default
-            source_dialect = "postgres"
-            transpiled_query = query
+        The query is validated, transpiled, limited and executed exactly as in
+        read_query. The result keeps its column types and can be read without
+        parsing, e.g. with pyarrow.ipc.open_stream, DuckDB or Polars. Results
+        are not cached.
 
-            if self.target_dialect != source_dialect:
-                logger.info(
-                    f"Transpiling query from {source_dialect} to {self.target_dialect}"
-                )
-                try:
-                    transpiled_query = transpile_query(
-                        query, source_dialect, self.target_dialect
-                    )
-                    logger.debug(f"Original query: {query}")
-                    logger.debug(f"Transpiled query: {transpiled_query}")
-                except Exception as transpile_error:
-                    logger.warning(
-                        f"Transpilation failed: {transpile_error}, using original query"
-                    )
-                    # If transpilation fails, fall back to original query
-                    transpiled_query = query
+        Args:
+            query: SQL query string
 
-            # Ensure connected
-            self._ensure_connected()
+        Returns:
+            Arrow IPC stream bytes representing query results
+        """
+        return self._run_query(self._prepare_query(query), self._batches_to_ipc)
 
-            # Execute the validated and transpiled query
-            with self._conn_lock:
-                result = self._conn.sql(transpiled_query).limit(self.row_limit)
-                df = result.execute()
-                # Convert dataframe to csv
-                return df.to_csv(index=False)
+    def read_query_stream(self, query: str) -> Iterator[bytes]:
+        """
+        Execute a read-only SQL query and yield results as CSV chunks
+
+        The query is validated, transpiled and limited as in read_query, and
+        each batch of rows is written out as it is fetched. Only one batch is
+        held in memory, and the first chunk starts with the header row. The
+        pooled connection is held until the iterator is exhausted or closed.
+        Closing it early stops the query and returns the connection to the
+        pool, to be checked with SELECT 1 before reuse. Results are not
+        cached, and the query is not retried once rows have been yielded.
+
+        Args:
+            query: SQL query string
 
-        except ExceptionGroup:
+        Yields:
+            UTF-8 encoded CSV chunks representing query results
+        """
+        transpiled_query = self._prepare_query(query)
+
+        num_rows = 0
+        start = time.perf_counter()
+        try:
+            limited_query = self._limit_query(transpiled_query)
+            with self._connection() as conn, self._query_timeout(conn):
+                reader = self._fetch_batches(conn, limited_query)
+                schema = _csv_schema(reader.schema)
+                sink = io.BytesIO()
+                with pacsv.CSVWriter(sink, schema) as writer:
+                    for batch in reader:
+                        writer.write_batch(_to_csv_batch(batch, schema))
+                        num_rows += batch.num_rows
+                        try:
+                            yield sink.getvalue()
+                        except GeneratorExit:
+                            # Closed early: drop the rest of the result, so
+                            # the connection can go back to the pool
+                            reader.close()
+                            raise
+                        sink.seek(0)
+                        sink.truncate()
+                # The header of an empty result, or anything flushed on close
+                if sink.tell():
+                    yield sink.getvalue()
+        except ex.QueryTimeoutError:
             raise
-        except Exception:
-            # Clear connection on error
-            self._conn = None
-            self.conn = None
+        except Exception as e:
+            raise ex.QueryError(f"Failed to execute query: {str(e)}") from e
+        self._log_query_time(num_rows, time.perf_counter() - start)
+
+    def _read_query(self, query: str) -> str:
+        """Validate, transpile and execute a query that is not in the cache."""
+        transpiled_query = self._prepare_query(query)
+
+        # Serve repeated queries from the persistent cache, if enabled
+        cached = self._read_cached_result(transpiled_query)
+        if cached is not None:
+            return cached
+
+        result = self._run_query(transpiled_query, self._batches_to_csv)
+        self._write_cached_result(transpiled_query, result)
+        return result
 
-            # Try one more time after reconnecting
+    def _prepare_query(self, query: str) -> str:
+        """
+        Validate a query and transpile it to the target dialect.
+
+        Args:
+            query: SQL query string in the postgres dialect
+
+        Returns:
+            The validated query in the target dialect
+
+        Raises:
+            ExceptionGroup: If the query fails validation
+        """
+        # Validate the SQL query first (no DB connection needed)
+        errors = self.sql_validator.validate_sql(query)
+
+        # DoNotDelete: Adding message and exceptions keywords to the exception group
+        # results in `TypeError: BaseExceptionGroup.__new__() takes exactly 2 arguments (0 given)`
+        if errors:
+            raise ExceptionGroup(
+                "Query validation failed",
+                errors,
+            )
+
+        # Transpile query if needed (postgres -> databricks, etc.)
+        # We assume Claude generates queries in postgres dialect by default
+        source_dialect = "postgres"
+        transpiled_query = query
+
+        if self.target_dialect != source_dialect:
+            logger.info(
+                "Transpiling query from %s to %s",
+                source_dialect,
+                self.target_dialect,
+            )
             try:
-                self._ensure_connected()
-                with self._conn_lock:
-                    result = self._conn.sql(transpiled_query).limit(self.row_limit)
-                    df = result.execute()
-                    return df.to_csv(index=False)
-            except Exception as retry_error:
-                raise ex.QueryError(f"Failed to execute query: {str(retry_error)}")
+                transpiled_query = transpile_query(
+                    query, source_dialect, self.target_dialect
+                )
+                logger.debug("Original query: %s", query)
+                logger.debug("Transpiled query: %s", transpiled_query)
+            except Exception as transpile_error:
+                logger.warning(
+                    f"Transpilation failed: {transpile_error}, using original query"
+                )
+                # If transpilation fails, fall back to original query
+                transpiled_query = query
 
-    def __del__(self):
-        """Clean up connection on deletion."""
-        if self._conn:
+        return transpiled_query
+
+    def _run_query(
+        self, query: str, encode: Callable[[pa.RecordBatchReader], Tuple[Any, int]]
+    ) -> Any:
+        """Execute a prepared query, retrying once if the connection failed."""
+        # The pool has discarded the failed connection, so the retry runs on
+        # a healthy or newly opened connection
+        for attempt in range(2):
+            try:
+                return self._execute_query(query, encode)
+            except ex.QueryTimeoutError:
+                raise
+            except Exception as e:
+                if attempt == 0 and self._is_connection_lost(e):
+                    logger.warning(f"Connection failed during query, retrying: {e}")
+                    continue
+                raise ex.QueryError(f"Failed to execute query: {str(e)}") from e
+
+    def _is_connection_lost(
+        self, error: Exception, conn: Optional[BaseBackend] = None
+    ) -> bool:
+        """
+        Check if a query failed because its connection was lost.
+
+        Only these failures are retried, on another connection. The
+        ConnectionError raised by _open_connection has already been retried
+        with back-off. Other driver OperationalErrors, such as a server-side
+        statement timeout, a full disk or a lock timeout, would recur.
+
+        Args:
+            error: The exception raised by the query
+            conn: The connection the query ran on, if known
+
+        Returns:
+            True if the error means the connection is no longer usable
+        """
+        if not isinstance(error, self._transient_errors):
+            return False
+        if type(error) is ConnectionError:
+            # Raised by _open_connection, not by a socket or driver
+            return False
+        if conn is not None and not self._is_connection_alive(conn, probe=False):
+            return True
+        sqlstate = getattr(error, "sqlstate", None)
+        if sqlstate is not None:
+            # psycopg: only SQLSTATE class 08 is a connection exception
+            return sqlstate.startswith("08")
+        return True
+
+    def _execute_query(
+        self, query: str, encode: Callable[[pa.RecordBatchReader], Tuple[Any, int]]
+    ) -> Any:
+        """
+        Execute a query on a pooled connection and return the encoded results.
+
+        When a query timeout is configured, the query is interrupted once the
+        limit is exceeded so that a runaway query cannot hold the connection.
+
+        Args:
+            query: Validated SQL query in the target dialect
+            encode: Function writing the result batches out, returning the
+                encoded result and the number of rows
+
+        Returns:
+            Query results as returned by encode
+        """
+        limited_query = self._limit_query(query)
+
+        with self._connection() as conn, self._query_timeout(conn):
+            start = time.perf_counter()
             try:
-                self._conn.disconnect()
-                logger.debug("Database connection closed during cleanup")
-            except Exception as cleanup_error:
+                # Batches are fetched as they are written, so this stays
+                # on the borrowed connection and under the timeout
+                result, num_rows = encode(self._fetch_batches(conn, limited_query))
+            finally:
+                elapsed = time.perf_counter() - start
+
+        self._log_query_time(num_rows, elapsed)
+        return result
+
+    def _log_query_time(self, num_rows: int, elapsed: float):
+        """Log the row count and time of a query, warning if it nearly timed out."""
+        logger.info("Query returned %d rows in %.3fs", num_rows, elapsed)
+        if self.query_timeout and elapsed > 0.8 * self.query_timeout:
+            logger.warning(
+                "Query took %.3fs, close to the %ss time limit",
+                elapsed,
+                self.query_timeout,
+            )
+
+    def _fetch_batches(self, conn: BaseBackend, query: str) -> pa.RecordBatchReader:
+        """Start a query and return a reader over its result batches."""
+        if self.target_dialect == "duckdb":
+            # Fetch Arrow straight from the DuckDB connection, skipping
+            # the schema lookup and recompilation of an ibis expression
+            return conn.raw_sql(query).fetch_record_batch(self.batch_size)
+        return conn.sql(query).to_pyarrow_batches(chunk_size=self.batch_size)
+
+    @contextmanager
+    def _query_timeout(self, conn: BaseBackend) -> Iterator[None]:
+        """
+        Interrupt the query running on a connection once query_timeout passes.
+
+        Raises:
+            QueryTimeoutError: If the block failed because it was interrupted
+        """
+        if not self.query_timeout:
+            yield
+            return
+
+        timed_out = threading.Event()
+        timer = threading.Timer(
+            self.query_timeout, self._interrupt_query, args=(conn, timed_out)
+        )
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        except Exception as e:
+            if timed_out.is_set():
+                raise ex.QueryTimeoutError(
+                    f"Query exceeded the time limit of {self.query_timeout} seconds",
+                    timeout_seconds=self.query_timeout,
+                ) from e
+            raise
+        finally:
+            timer.cancel()
+
+    def _result_cache_path(self, query: str) -> Optional[Path]:
+        """
+        Get the persistent cache file for a query.
+
+        The key covers the connection and every setting that changes the
+        result, so a cache directory can be shared between configurations.
+
+        Args:
+            query: SQL query in the target dialect
+
+        Returns:
+            Path of the cache file, or None if the cache is disabled
+        """
+        if self.cache_dir is None:
+            return None
+
+        key = "\0".join(
+            [
+                self.connection_string,
+                self.cdm_schema,
+                self.vocab_schema,
+                str(self.row_limit),
+                str(self.allow_source_value_columns),
+                # Formatting variants share a file, as in the in-memory cache
+                _canonical_query(query, self.target_dialect),
+            ]
+        )
+        return self.cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.csv"
+
+    def _read_cached_result(self, query: str) -> Optional[str]:
+        """Read a query result from the persistent cache, if present."""
+        path = self._result_cache_path(query)
+        if path is None:
+            return None
+
+        try:
+            if (
+                self.cache_ttl is not None
+                and time.time() - path.stat().st_mtime >= self.cache_ttl
+            ):
+                # Expired, so the query is run again and the file rewritten
+                path.unlink(missing_ok=True)
+                return None
+            result = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as cache_error:
+            logger.warning("Failed to read query cache %s: %s", path, cache_error)
+            return None
+
+        logger.info("Query result served from cache")
+        return result
+
+    def _write_cached_result(self, query: str, result: str):
+        """Write a query result to the persistent cache, if enabled."""
+        path = self._result_cache_path(query)
+        if path is None:
+            return
+
+        # Write to a temporary file first so readers never see a partial result
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_text(result, encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as cache_error:
+            logger.warning("Failed to write query cache %s: %s", path, cache_error)
+            tmp_path.unlink(missing_ok=True)
+
+    def _limit_query(self, query: str) -> str:
+        """
+        Apply the row limit to a query in its SQL text.
+
+        Args:
+            query: SQL query in the target dialect
+
+        Returns:
+            SQL query in the target dialect with the row limit applied
+        """
+        return _apply_row_limit(query, self.target_dialect, self.row_limit)
+
+    @staticmethod
+    def _batches_to_csv(reader: pa.RecordBatchReader) -> Tuple[str, int]:
+        """
+        Serialise a stream of Arrow record batches to CSV text.
+
+        Each batch is written as it arrives, so the full result is never held
+        as an Arrow table alongside its CSV text.
+
+        Args:
+            reader: Reader yielding the query result batches
+
+        Returns:
+            CSV string with a header row, and the number of rows written
+        """
+        schema = _csv_schema(reader.schema)
+        buf = io.BytesIO()
+        num_rows = 0
+        with pacsv.CSVWriter(buf, schema) as writer:
+            for batch in reader:
+                writer.write_batch(_to_csv_batch(batch, schema))
+                num_rows += batch.num_rows
+        return buf.getvalue().decode("utf-8"), num_rows
+
+    @staticmethod
+    def _batches_to_ipc(reader: pa.RecordBatchReader) -> Tuple[bytes, int]:
+        """
+        Serialise a stream of Arrow record batches to an Arrow IPC stream.
+
+        Args:
+            reader: Reader yielding the query result batches
+
+        Returns:
+            Arrow IPC stream bytes, and the number of rows written
+        """
+        sink = pa.BufferOutputStream()
+        num_rows = 0
+        with pa.ipc.new_stream(sink, reader.schema) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                num_rows += batch.num_rows
+        return sink.getvalue().to_pybytes(), num_rows
+
+    @staticmethod
+    def _table_to_csv(table: pa.Table) -> str:
+        """
+        Serialise an Arrow table to CSV text.
+
+        Results are written with the Arrow CSV writer rather than through a
+        pandas DataFrame, avoiding per-cell Python formatting except for
+        nested and interval columns, which the writer does not support.
+
+        Args:
+            table: Arrow table holding query results
+
+        Returns:
+            CSV string with a header row
+        """
+        schema = _csv_schema(table.schema)
+        buf = io.BytesIO()
+        with pacsv.CSVWriter(buf, schema) as writer:
+            for batch in table.to_batches():
+                writer.write_batch(_to_csv_batch(batch, schema))
+        return buf.getvalue().decode("utf-8")
+
+    def _interrupt_query(self, conn: BaseBackend, timed_out: threading.Event):
+        """Interrupt the query running on the underlying driver connection."""
+        timed_out.set()
+        con = getattr(conn, "con", None)
+        try:
+            if hasattr(con, "interrupt"):
+                # DuckDB
+                con.interrupt()
+            elif hasattr(con, "cancel"):
+                # psycopg (PostgreSQL)
+                con.cancel()
+            else:
                 logger.warning(
-                    f"Error closing connection during cleanup: {cleanup_error}"
+                    f"Query timeout reached but {self.target_dialect} queries cannot be interrupted"
                 )
+        except Exception as interrupt_error:
+            logger.warning(
+                f"Failed to interrupt query after timeout: {interrupt_error}"
+            )
+
+    def close(self):
+        """Close all idle database connections in the pool, and the DuckDB database."""
+        with self._conn_lock:
+            conns, self._idle_conns = self._idle_conns, []
+            root, self._duckdb_root = self._duckdb_root, None
+        for conn, _ in conns:
+            self._close_connection(conn)
+        if conns:
+            logger.debug("Closed %d database connections", len(conns))
+        # Closing the DuckDB database also closes any cursors still in use
+        if root is not None:
+            self._close_connection(root)
+
+    def __del__(self):
+        """Clean up connections on deletion."""
+        if hasattr(self, "_idle_conns"):
+            self.close()
@@ -1,6 +1,7 @@
 import os
 import sys
 import signal
+import asyncio
 from mcp.server.fastmcp import FastMCP
 import mcp
 from dotenv import load_dotenv, find_dotenv
@@ -9,8 +10,9 @@ from omcp.trace_context import read_trace_context
 
 import uuid
 import time
+import inspect
 import traceback
-from functools import wraps
+from functools import lru_cache, wraps
 from urllib.parse import quote_plus
 
 # OpenTelemetry context propagation
@@ -18,6 +20,51 @@ from opentelemetry.propagate import extract
 from opentelemetry import context as otel_context_api
 
 
+@lru_cache(maxsize=1)
+def _environment_context():
+    """
+    Collect environment variables that might contain relevant client context.
+
+    The process environment does not change while the server runs, so this is
+    resolved once on first use instead of on every tool call.
+    """
+    env_keys = [
+        "MCP_CLIENT_INFO",
+        "CONVERSATION_ID",
+        "SESSION_ID",
+        "USER_CONTEXT",
+    ]
+    return {
+        env_key: os.environ.get(env_key)
+        for env_key in env_keys
+        if os.environ.get(env_key)
+    }
+
+
+def _caller_context(caller_frame):
+    """
+    Collect variables in a calling frame that might contain prompt info.
+
+    Args:
+        caller_frame: The frame to look in, or None
+
+    Returns:
+        Dict of truncated string values keyed as caller_<variable name>
+    """
+    extracted = {}
+    try:
+        if caller_frame:
+            caller_locals = caller_frame.f_locals
+            for var_name in ["prompt", "messages", "conversation", "request"]:
+                if var_name in caller_locals:
+                    extracted[f"caller_{var_name}"] = str(caller_locals[var_name])[
+                        :1000
+                    ]  # Truncate for safety
+    except Exception:
+        pass  # Ignore frame inspection errors
+    return extracted
+
+
 # --- Per-tool decorator to capture context + Langfuse trace ---
 def capture_context(tool_name=None):
     """
@@ -26,11 +73,13 @@ def capture_context(tool_name=None):
       - attempts to capture any LLM prompt context if available
       - starts a Langfuse per-request trace/span/generation (if enabled)
       - records input/output to Langfuse (if enabled)
+      - runs the tool in a worker thread, so blocking database calls do not
+        stall the event loop and other tool calls can proceed concurrently
     """
 
     def decorator(func):
         @wraps(func)
-        def wrapper(*args, **kwargs):
+        def wrapper(caller_context, *args, **kwargs):
             request_id = str(uuid.uuid4())
             ts = time.strftime("%d/%m/%y %H:%M:%S", time.localtime())
 
@@ -77,37 +126,11 @@ def capture_context(tool_name=None):
                             if prompt_key in arg:
                                 extracted[f"nested_{prompt_key}"] = arg[prompt_key]
 
-            # 3) Try to extract from the current execution context
-            import inspect
-
-            frame = inspect.currentframe()
-            try:
-                # Look for any variables in calling frames that might contain prompt info
-                caller_frame = frame.f_back.f_back if frame and frame.f_back else None
-                if caller_frame:
-                    caller_locals = caller_frame.f_locals
-                    for var_name in ["prompt", "messages", "conversation", "request"]:
-                        if var_name in caller_locals:
-                            extracted[f"caller_{var_name}"] = str(
-                                caller_locals[var_name]
-                            )[:1000]  # Truncate for safety
-            except Exception:
-                pass  # Ignore frame inspection errors
-            finally:
-                del frame  # Prevent reference cycles
+            # 3) Variables from the calling frames, captured by async_wrapper
+            extracted.update(caller_context)
 
             # 4) Capture environment variables that might contain relevant context
-            env_context = {}
-            env_keys = [
-                "MCP_CLIENT_INFO",
-                "CONVERSATION_ID",
-                "SESSION_ID",
-                "USER_CONTEXT",
-            ]
-            for env_key in env_keys:
-                if os.environ.get(env_key):
-                    env_context[env_key] = os.environ.get(env_key)
-
+            env_context = _environment_context()
             if env_context:
                 extracted["environment_context"] = env_context
 
@@ -124,6 +147,9 @@ def capture_context(tool_name=None):
 
             # Start Langfuse logging for this single call (if enabled)
             if langfuse:
+                tool_called = False
+                tool_error = None
+                response = None
                 try:
                     # Read trace context from shared file (propagated from fastomop)
                     trace_ctx = read_trace_context()
@@ -151,7 +177,9 @@ def capture_context(tool_name=None):
                         input_data["prompt_related_data"] = prompt_metadata
                         # Log specifically that we found prompt-related content
                         logger.info(
-                            f"Captured prompt-related metadata for {call_meta['tool']}: {list(prompt_metadata.keys())}"
+                            "Captured prompt-related metadata for %s: %s",
+                            call_meta["tool"],
+                            list(prompt_metadata.keys()),
                         )
 
                     # Extract OpenTelemetry context from W3C Trace Context headers
@@ -171,12 +199,14 @@ def capture_context(tool_name=None):
                         context_token = otel_context_api.attach(extracted_context)
 
                         logger.info(
-                            f"Linking {call_meta['tool']} to parent trace (OpenTelemetry context)"
+                            "Linking %s to parent trace (OpenTelemetry context)",
+                            call_meta["tool"],
                         )
                     else:
                         # No parent context, create standalone span
                         logger.debug(
-                            f"No parent trace context, creating standalone span for {call_meta['tool']}"
+                            "No parent trace context, creating standalone span for %s",
+                            call_meta["tool"],
                         )
 
                     try:
@@ -189,18 +219,11 @@ def capture_context(tool_name=None):
                             # Update with input data
                             span.update(input=input_data)
 
+                            tool_called = True
                             try:
                                 response = func(*args, **kwargs)
-                                # Update with output
-                                span.update(
-                                    output={
-                                        "response": response,
-                                        "response_type": type(response).__name__,
-                                    }
-                                )
-                                return response
-
                             except Exception as ex:
+                                tool_error = ex
                                 err_info = {
                                     "error": str(ex),
                                     "error_type": type(ex).__name__,
@@ -211,12 +234,26 @@ def capture_context(tool_name=None):
                                     f"Tool {call_meta['tool']} failed: {str(ex)}"
                                 )
                                 raise
+
+                            # Update with output
+                            span.update(
+                                output={
+                                    "response": response,
+                                    "response_type": type(response).__name__,
+                                }
+                            )
+                            return response
                     finally:
                         # Detach the context to restore the previous context
                         if context_token is not None:
                             otel_context_api.detach(context_token)
 
                 except Exception as langfuse_error:
+                    # Errors raised by the tool itself are not Langfuse failures:
+                    # propagate them instead of running the tool a second time
+                    if tool_error is not None:
+                        raise tool_error
+
                     # If Langfuse fails for any reason, don't crash the server
                     logger.exception(
                         "Langfuse logging failed for tool %s (request %s): %s",
@@ -224,6 +261,8 @@ def capture_context(tool_name=None):
                         request_id,
                         str(langfuse_error),
                     )
+                    if tool_called:
+                        return response
                     # Fall through to execute function without Langfuse logging
 
             # Execute function without Langfuse logging (if disabled or failed)
@@ -234,7 +273,23 @@ def capture_context(tool_name=None):
                 logger.error(f"Function execution failed: {str(func_error)}")
                 raise
 
-        return wrapper
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            # The calling frames are only on this thread's stack, so they are
+            # inspected here rather than in the worker thread
+            frame = inspect.currentframe()
+            try:
+                caller_context = _caller_context(
+                    frame.f_back.f_back if frame and frame.f_back else None
+                )
+            finally:
+                del frame  # Prevent reference cycles
+
+            # to_thread copies the current context, so the OpenTelemetry
+            # context attached in wrapper stays local to this call
+            return await asyncio.to_thread(wrapper, caller_context, *args, **kwargs)
+
+        return async_wrapper
 
     return decorator
 
@@ -257,13 +312,13 @@ db = None
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully."""
     logger.info(f"Received signal {signum}, shutting down gracefully...")
-    if db and hasattr(db, "_conn") and db._conn:
+    if db:
         try:
-            db._conn.disconnect()
-            logger.info("Database connection closed")
+            db.close()
+            logger.info("Database connections closed")
         except Exception as shutdown_error:
             logger.warning(
-                f"Error closing database connection during shutdown: {shutdown_error}"
+                f"Error closing database connections during shutdown: {shutdown_error}"
             )
     sys.exit(0)
 
@@ -277,6 +332,10 @@ signal.signal(signal.SIGINT, signal_handler)
 db_type = os.environ.get("DB_TYPE")
 db_path = os.environ.get("DB_PATH")
 db_read_only = os.environ.get("DB_READ_ONLY", "false").lower() == "true"
+query_timeout = float(os.environ.get("QUERY_TIMEOUT", "60"))
+query_cache_dir = os.environ.get("QUERY_CACHE_DIR")
+query_cache_ttl = float(os.environ.get("QUERY_CACHE_TTL", "300"))
+db_pool_size = int(os.environ.get("DB_POOL_SIZE", "4"))
 
 if db_type == "duckdb":
     if db_read_only:
@@ -336,6 +395,10 @@ try:
         cdm_schema=os.environ.get("CDM_SCHEMA", "base"),
         vocab_schema=os.environ.get("VOCAB_SCHEMA", "base"),
         read_only=db_read_only,
+        query_timeout=query_timeout,
+        cache_dir=query_cache_dir,
+        pool_size=db_pool_size,
+        cache_ttl=query_cache_ttl or None,
     )
     logger.info(f"Database initialized successfully (read-only: {db_read_only})")
 except Exception as e:
@@ -343,6 +406,21 @@ except Exception as e:
     sys.exit(1)
 
 
+# Concept lookup shared by the Lookup_* tools. Only the schema, search term,
+# domain, vocabulary and limit vary between calls.
+CONCEPT_LOOKUP_QUERY = """
+SELECT concept_id, concept_name, concept_code, vocabulary_id, domain_id
+FROM {schema}.concept
+WHERE LOWER(concept_name) LIKE LOWER('%{term}%')
+  AND domain_id = '{domain_id}'
+  AND vocabulary_id = '{vocabulary_id}'
+  AND standard_concept = 'S'
+  AND invalid_reason IS NULL
+ORDER BY LENGTH(concept_name), concept_name
+LIMIT {limit}
+"""
+
+
 @mcp_app.tool(
     name="Get_Information_Schema",
     description="Get the database schema name and type. Returns the schema prefix to use for table references (e.g., 'gold') and the database type (e.g., 'databricks').",
@@ -369,7 +447,7 @@ def get_information_schema() -> mcp.types.CallToolResult:
 
         result = f"Schema: {schema_name}\nDatabase Type: {database_type}"
 
-        logger.debug(f"Schema info: {result}")
+        logger.debug("Schema info: %s", result)
         return mcp.types.CallToolResult(
             content=[
                 mcp.types.TextContent(type="text", text=result),
@@ -405,7 +483,7 @@ def read_query(query: str) -> mcp.types.CallToolResult:
         Result of the query as a string or a detailed error message if the query fails.
     """
     try:
-        logger.info(f"Executing query: {query[:100]}...")
+        logger.info("Executing query: %.100s...", query)
         result = db.read_query(query)
         logger.info("Query executed successfully")
         return mcp.types.CallToolResult(
@@ -439,57 +517,70 @@ def read_query(query: str) -> mcp.types.CallToolResult:
         )
 
 
-@mcp_app.tool(
-    name="Lookup_Drug",
-    description="Look up drug concepts by name in the OMOP concept table. Returns standardized drug concepts with concept_id, concept_name, concept_code, vocabulary_id, and domain_id. Only searches standard RxNorm vocabulary.",
-)
-@capture_context(tool_name="Lookup_Drug")
-def lookup_drug(term: str, limit: int = 10) -> mcp.types.CallToolResult:
-    """Look up drug concepts by name.
-
-    This function searches for drug concepts in the OMOP concept table by partial name match.
-    Only returns standard, valid drug concepts from RxNorm vocabulary, ordered by name length (shortest first).
-    Excludes non-standard vocabularies like RxNorm Extension to ensure compatibility.
+def _lookup_concepts(
+    term: str, limit: int, domain_id: str, vocabulary_id: str
+) -> mcp.types.CallToolResult:
+    """Search standard, valid concepts of one domain and vocabulary by name.
 
     Args:
-        term: Drug name to search for (case-insensitive partial match)
-        limit: Maximum number of results to return (default: 10)
+        term: Concept name to search for (case-insensitive partial match)
+        limit: Maximum number of results to return
+        domain_id: OMOP domain to search (e.g., 'Drug', 'Condition')
+        vocabulary_id: Vocabulary to restrict results to (e.g., 'RxNorm')
 
     Returns:
         CSV formatted results with: concept_id, concept_name, concept_code, vocabulary_id, domain_id
     """
+    label = domain_id.lower()
     try:
-        schema = db.cdm_schema
-        # Filter to RxNorm vocabulary only - excludes RxNorm Extension and other non-standard vocabularies
-        query = f"""
-        SELECT concept_id, concept_name, concept_code, vocabulary_id, domain_id
-        FROM {schema}.concept
-        WHERE LOWER(concept_name) LIKE LOWER('%{term}%')
-          AND domain_id = 'Drug'
-          AND vocabulary_id = 'RxNorm'
-          AND standard_concept = 'S'
-          AND invalid_reason IS NULL
-        ORDER BY LENGTH(concept_name), concept_name
-        LIMIT {limit}
-        """
-        logger.info(f"Looking up drug: {term}")
+        query = CONCEPT_LOOKUP_QUERY.format(
+            schema=db.cdm_schema,
+            term=term,
+            domain_id=domain_id,
+            vocabulary_id=vocabulary_id,
+            limit=limit,
+        )
+        logger.info("Looking up %s: %s", label, term)
         result = db.read_query(query)
-        logger.info(f"Drug lookup completed for: {term}")
+        logger.info("%s lookup completed for: %s", domain_id, term)
         return mcp.types.CallToolResult(
             content=[mcp.types.TextContent(type="text", text=result)]
         )
     except Exception as e:
-        logger.error(f"Failed to lookup drug '{term}': {e}")
+        logger.error(f"Failed to lookup {label} '{term}': {e}")
         return mcp.types.CallToolResult(
             isError=True,
             content=[
                 mcp.types.TextContent(
-                    type="text", text=f"Failed to lookup drug: {str(e)}"
+                    type="text", text=f"Failed to lookup {label}: {str(e)}"
                 )
             ],
         )
 
 
+@mcp_app.tool(
+    name="Lookup_Drug",
+    description="Look up drug concepts by name in the OMOP concept table. Returns standardized drug concepts with concept_id, concept_name, concept_code, vocabulary_id, and domain_id. Only searches standard RxNorm vocabulary.",
+)
+@capture_context(tool_name="Lookup_Drug")
+def lookup_drug(term: str, limit: int = 10) -> mcp.types.CallToolResult:
+    """Look up drug concepts by name.
+
+    This function searches for drug concepts in the OMOP concept table by partial name match.
+    Only returns standard, valid drug concepts from RxNorm vocabulary, ordered by name length (shortest first).
+    Excludes non-standard vocabularies like RxNorm Extension to ensure compatibility.
+
+    Args:
+        term: Drug name to search for (case-insensitive partial match)
+        limit: Maximum number of results to return (default: 10)
+
+    Returns:
+        CSV formatted results with: concept_id, concept_name, concept_code, vocabulary_id, domain_id
+    """
+    # Filter to RxNorm vocabulary only - excludes RxNorm Extension and other non-standard vocabularies
+    return _lookup_concepts(term, limit, domain_id="Drug", vocabulary_id="RxNorm")
+
+
 @mcp_app.tool(
     name="Lookup_Condition",
     description="Look up condition concepts by name in the OMOP concept table. Returns standardized condition concepts with concept_id, concept_name, concept_code, vocabulary_id, and domain_id. Only searches standard SNOMED vocabulary.",
@@ -509,36 +600,8 @@ def lookup_condition(term: str, limit: int = 10) -> mcp.types.CallToolResult:
     Returns:
         CSV formatted results with: concept_id, concept_name, concept_code, vocabulary_id, domain_id
     """
-    try:
-        schema = db.cdm_schema
-        # Filter to SNOMED vocabulary only - standard vocabulary for conditions
-        query = f"""
-        SELECT concept_id, concept_name, concept_code, vocabulary_id, domain_id
-        FROM {schema}.concept
-        WHERE LOWER(concept_name) LIKE LOWER('%{term}%')
-          AND domain_id = 'Condition'
-          AND vocabulary_id = 'SNOMED'
-          AND standard_concept = 'S'
-          AND invalid_reason IS NULL
-        ORDER BY LENGTH(concept_name), concept_name
-        LIMIT {limit}
-        """
-        logger.info(f"Looking up condition: {term}")
-        result = db.read_query(query)
-        logger.info(f"Condition lookup completed for: {term}")
-        return mcp.types.CallToolResult(
-            content=[mcp.types.TextContent(type="text", text=result)]
-        )
-    except Exception as e:
-        logger.error(f"Failed to lookup condition '{term}': {e}")
-        return mcp.types.CallToolResult(
-            isError=True,
-            content=[
-                mcp.types.TextContent(
-                    type="text", text=f"Failed to lookup condition: {str(e)}"
-                )
-            ],
-        )
+    # Filter to SNOMED vocabulary only - standard vocabulary for conditions
+    return _lookup_concepts(term, limit, domain_id="Condition", vocabulary_id="SNOMED")
 
 
 def main():
@@ -551,8 +614,6 @@ def main():
         elif transport_type == "sse":
             logger.info(f"Server will be available at http://{host}:{port}")
             # Add initialization delay to prevent timing issues
-            import time
-
             time.sleep(1)  # Give the server time to fully initialize
             mcp_app.run(transport="sse")
     except KeyboardInterrupt:
@@ -2,50 +2,70 @@
 This module provides functionality to validate SQL queries using SQLGlot
 """
 
+import re
+
 import sqlglot as sg
 import sqlglot.expressions as exp
 import typing as t
 import omcp.exceptions as ex
+from omcp.utils import LRUCache, parse_sql
 from sqlglot.optimizer.scope import build_scope
 
-OMOP_TABLES = [
-    "care_site",
-    "cdm_source",
-    "concept",
-    "concept_ancestor",
-    "concept_class",
-    "concept_relationship",
-    "concept_synonym",
-    "condition_era",
-    "condition_occurrence",
-    "cost",
-    "death",
-    "device_exposure",
-    "domain",
-    "dose_era",
-    "drug_era",
-    "drug_exposure",
-    "drug_strength",
-    "episode",
-    "episode_event",
-    "fact_relationship",
-    "location",
-    "measurement",
-    "metadata",
-    "note",
-    "note_nlp",
-    "observation",
-    "observation_period",
-    "payer_plan_period",
-    "person",
-    "procedure_occurrence",
-    "provider",
-    "relationship",
-    "specimen",
-    "visit_detail",
-    "visit_occurrence",
-    "vocabulary",
-]
+# Stored as a set so each table reference is checked with one hash lookup
+OMOP_TABLES = frozenset(
+    {
+        "care_site",
+        "cdm_source",
+        "concept",
+        "concept_ancestor",
+        "concept_class",
+        "concept_relationship",
+        "concept_synonym",
+        "condition_era",
+        "condition_occurrence",
+        "cost",
+        "death",
+        "device_exposure",
+        "domain",
+        "dose_era",
+        "drug_era",
+        "drug_exposure",
+        "drug_strength",
+        "episode",
+        "episode_event",
+        "fact_relationship",
+        "location",
+        "measurement",
+        "metadata",
+        "note",
+        "note_nlp",
+        "observation",
+        "observation_period",
+        "payer_plan_period",
+        "person",
+        "procedure_occurrence",
+        "provider",
+        "relationship",
+        "specimen",
+        "visit_detail",
+        "visit_occurrence",
+        "vocabulary",
+    }
+)
+
+
+# Health checks and schema queries that bypass validation, matched
+# case-insensitively without lowering or stripping a copy of the query
+SYSTEM_QUERY_PATTERN = re.compile(
+    r"\A\s*select 1|health_check|information_schema", re.IGNORECASE
+)
+
+# Catalogue tables that are not subject to the OMOP table check
+SYSTEM_TABLES = frozenset({"information_schema"})
+
+# Column name suffixes that expose source values, checked in a single
+# endswith() call per column
+SOURCE_VALUE_SUFFIXES = ("_source_value", "_source_concept_id")
 
 
 class SQLValidator:
@@ -65,15 +85,21 @@ class SQLValidator:
             allow_source_values (bool): Flag to allow source values in validation.
             exclude_tables (list): A list of tables to exclude from validation.
             exclude_columns (list): A list of columns to exclude from validation.
+            from_dialect (str): The SQL dialect queries are written in.
         """
 
         self.allow_source_value_columns: bool = allow_source_value_columns
-        self.exclude_tables: t.List = (
-            list(map(str.lower, exclude_tables)) if exclude_tables is not None else []
+        self.from_dialect = from_dialect
+        # Stored as sets so every table and column is checked with one hash lookup
+        self.exclude_tables: t.FrozenSet[str] = frozenset(
+            map(str.lower, exclude_tables or [])
         )
-        self.exclude_columns: t.List = (
-            list(map(str.lower, exclude_columns)) if exclude_columns is not None else []
+        self.exclude_columns: t.FrozenSet[str] = frozenset(
+            map(str.lower, exclude_columns or [])
         )
+        # Validation results per query string, so repeated queries are not
+        # parsed and checked again
+        self._validation_cache = LRUCache(maxsize=1024)
 
     def _check_is_select_query(
         self, parsed_sql: exp.Expression
@@ -112,9 +138,9 @@ class SQLValidator:
         ]
 
         not_omop_tables = [
-            table.name.lower()
-            for table in tables
-            if table.name.lower() not in OMOP_TABLES
+            name
+            for name in (table.name.lower() for table in tables)
+            if name not in OMOP_TABLES
         ]
 
         if not_omop_tables:
@@ -123,13 +149,13 @@ class SQLValidator:
             )
 
     def _check_unauthorized_tables(
-        self, tables: t.List[exp.Table]
+        self, table_names: t.List[str]
     ) -> ex.UnauthorizedTableError:
         """
         Checks for unauthorized tables in the provided list of tables.
 
         Args:
-            tables (List[exp.Table]): A list of table expressions to validate.
+            table_names (List[str]): A list of lowercased table names to validate.
 
         Returns:
             UnauthorizedTableError: An error indicating the presence of unauthorized tables
@@ -137,9 +163,7 @@ class SQLValidator:
         """
 
         unauthorized_tables = [
-            table.name.lower()
-            for table in tables
-            if table.name.lower() in self.exclude_tables
+            name for name in table_names if name in self.exclude_tables
         ]
 
         if unauthorized_tables:
@@ -148,23 +172,20 @@ class SQLValidator:
             )
 
     def _check_unauthorized_columns(
-        self, columns: t.List[exp.Column]
+        self, column_names: t.List[str]
     ) -> ex.UnauthorizedColumnError:
         """
         Checks for unauthorized columns in the provided list of columns.
 
         Args:
-            columns (List[exp.Column]): A list of column expressions.
+            column_names (List[str]): A list of lowercased column names.
 
         Returns:
             UnauthorizedColumnError: An error indicating the presence of unauthorized columns
             in the query, if any are found. Otherwise, returns None.
         """
-        print(self.exclude_columns)
         unauthorized_columns = [
-            column.name.lower()
-            for column in columns
-            if column.name.lower() in self.exclude_columns
+            name for name in column_names if name in self.exclude_columns
         ]
         if unauthorized_columns:
             return ex.UnauthorizedColumnError(
@@ -172,13 +193,13 @@ class SQLValidator:
             )
 
     def _check_source_value_columns(
-        self, columns: t.List[exp.Column]
+        self, column_names: t.List[str]
     ) -> ex.UnauthorizedColumnError:
         """
         Check if the query contains source value or source_concept_id columns.
 
         Args:
-            columns (list): A list of column expressions.
+            column_names (list): A list of lowercased column names.
 
         Returns:
             UnauthorizedColumnError: If source value columns are found.
@@ -188,10 +209,7 @@ class SQLValidator:
             return None
 
         source_value_columns = [
-            column.name.lower()
-            for column in columns
-            if column.name.lower().endswith("_source_value")
-            or column.name.lower().endswith("_source_concept_id")
+            name for name in column_names if name.endswith(SOURCE_VALUE_SUFFIXES)
         ]
 
         if source_value_columns:
@@ -212,16 +230,33 @@ class SQLValidator:
             list: A list of errors found during validation. If no errors, returns an empty list.
 
         """
+        errors = self._validation_cache.get(sql)
+        if errors is None:
+            errors = self._validate(sql)
+            self._validation_cache[sql] = errors
+        # Copy the cached result so callers cannot modify it
+        return list(errors)
+
+    def _validate(self, sql: str) -> t.Tuple[Exception, ...]:
+        """
+        Run all validation checks on the SQL query.
+
+        Args:
+            sql (str): The SQL query to validate.
+
+        Returns:
+            tuple: The errors found during validation.
+        """
 
         errors = []
 
         # Allow system queries (health checks and schema queries)
         if self._is_system_query(sql):
-            return []  # System queries are always allowed
+            return ()  # System queries are always allowed
 
         try:
-            # Parse the SQL query
-            parsed_sql = sg.parse_one(sql)
+            # Parse the SQL query, sharing the tree with the transpiler
+            parsed_sql = parse_sql(sql, self.from_dialect)
 
             # Validate the query to ensure it's a SELECT statement
 
@@ -229,36 +264,46 @@ class SQLValidator:
             if is_not_select_query:
                 raise is_not_select_query
 
-            tables = list(parsed_sql.find_all(exp.Table))
-            columns = list(parsed_sql.find_all(exp.Column))
+            # Collect tables, columns and COUNT(*) in a single walk of the
+            # syntax tree, lowering each name once for all of the checks below
+            table_names = []
+            column_names = []
+            has_count_star = False
+            for node in parsed_sql.find_all(exp.Table, exp.Column, exp.Count):
+                if isinstance(node, exp.Table):
+                    table_names.append(node.name.lower())
+                elif isinstance(node, exp.Column):
+                    column_names.append(node.name.lower())
+                elif isinstance(node.this, exp.Star):
+                    has_count_star = True
             # joins = parsed_sql.find_all(exp.Join)
             # where_clauses = parsed_sql.find_all(exp.Where)
 
-            if not tables:
+            if not table_names:
                 errors.append(ex.TableNotFoundError("No tables found in the query."))
-            if not columns and "count(*)" not in sql.lower():
+            if not column_names and not has_count_star:
                 errors.append(ex.ColumnNotFoundError("No columns found in the query."))
 
             # Check is OMOP table (skip for system tables like information_schema)
-            if not self._has_system_tables(tables):
+            if not self._has_system_tables(table_names):
                 errors.append(self._check_is_omop_table(parsed_sql))
 
             # Check for excluded tables
-            errors.append(self._check_unauthorized_tables(tables))
+            errors.append(self._check_unauthorized_tables(table_names))
 
             # Check for excluded columns
-            errors.append(self._check_unauthorized_columns(columns))
+            errors.append(self._check_unauthorized_columns(column_names))
 
             # Check for source value columns
-            errors.append(self._check_source_value_columns(columns))
+            errors.append(self._check_source_value_columns(column_names))
 
         except sg.ParseError as e:
             errors.append(e)
         except Exception as e:
             errors.append(e)
         finally:
-            errors = list(filter(None, errors))  # Remove None values from the list
-            return errors
+            # Remove None values from the list
+            return tuple(filter(None, errors))
 
     def _is_system_query(self, sql: str) -> bool:
         """
@@ -270,33 +315,17 @@ class SQLValidator:
         Returns:
             bool: True if this is a system query, False otherwise.
         """
-        sql_lower = sql.lower().strip()
-
-        # Health check queries
-        if sql_lower.startswith("select 1") or "health_check" in sql_lower:
-            return True
-
-        # Information schema queries
-        if "information_schema" in sql_lower:
-            return True
+        # Health check queries (SELECT 1, health_check) and information schema queries
+        return SYSTEM_QUERY_PATTERN.search(sql) is not None
 
-        # Other system queries can be added here
-        return False
-
-    def _has_system_tables(self, tables: t.List[exp.Table]) -> bool:
+    def _has_system_tables(self, table_names: t.List[str]) -> bool:
         """
         Check if the query contains system tables like information_schema.
 
         Args:
-            tables (List[exp.Table]): List of table expressions.
+            table_names (List[str]): List of lowercased table names.
 
         Returns:
             bool: True if any system tables are found.
         """
-        system_tables = ["information_schema"]
-
-        for table in tables:
-            if table.name.lower() in system_tables:
-                return True
-
-        return False
+        return not SYSTEM_TABLES.isdisjoint(table_names)
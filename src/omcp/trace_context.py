@@ -10,11 +10,13 @@ Langfuse V3 Note:
 
 import os
 import json
+import logging
 import platform
 import tempfile
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 
+logger = logging.getLogger("omcp")
 
 # Shared trace context file path (same as fastomop)
 # Use platform-specific temp directory for cross-platform compatibility
@@ -29,36 +31,56 @@ TRACE_CONTEXT_FILE = Path(
     os.environ.get("LANGFUSE_TRACE_CONTEXT_FILE", str(default_path))
 )
 
+# Last parsed trace context, keyed by the file's inode, mtime, ctime and size
+# so that repeated tool calls within the same parent trace skip the read and
+# JSON parse. A traceparent always has the same length, and mtime can be as
+# coarse as 2s, so a rewrite is only reliably seen through the inode (changed
+# by an atomic replace) or the ctime (changed by any write, even when the
+# mtime is set back)
+_cached_stat: Optional[Tuple[int, int, int, int]] = None
+_cached_context: Optional[Dict[str, Optional[str]]] = None
+
 
 def read_trace_context() -> Dict[str, Optional[str]]:
     """
     Read current trace context from shared file.
 
     Returns W3C Trace Context headers for proper OpenTelemetry propagation.
+    The parsed file is cached and only re-read when its stat changes.
 
     Returns:
         Dict with traceparent, tracestate, and session_id (or None if not available)
         traceparent format: version-trace_id-parent_span_id-trace_flags
         Example: "00-xxxxxx-b7ad6b7169203331-01"
     """
+    global _cached_stat, _cached_context
+
     try:
-        if TRACE_CONTEXT_FILE.exists():
+        stat = TRACE_CONTEXT_FILE.stat()
+    except OSError:
+        stat = None
+
+    try:
+        if stat is not None:
+            stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_size)
+            if stat_key == _cached_stat and _cached_context is not None:
+                return dict(_cached_context)
+
             with open(TRACE_CONTEXT_FILE, "r") as f:
                 context = json.load(f)
-                return {
+                _cached_context = {
                     "traceparent": context.get("traceparent"),
                     "tracestate": context.get("tracestate"),
                     "session_id": context.get("session_id"),
                     # Backward compatibility: also read old trace_id format
                     "trace_id": context.get("trace_id"),
                 }
+                _cached_stat = stat_key
+                return dict(_cached_context)
     except Exception as e:
         # Non-critical error, return empty context
         # Only log if file exists but can't be read (actual error)
         if TRACE_CONTEXT_FILE.exists():
-            import logging
-
-            logger = logging.getLogger("omcp")
             logger.warning(
                 f"Failed to read trace context from {TRACE_CONTEXT_FILE}: {e}"
             )
@@ -2,9 +2,13 @@
 Transpile SQL queries from PostgreSQL to Databricks Spark SQL using sqlglot.
 """
 
-import sqlglot
 from sqlglot import exp
+from functools import lru_cache
 from pathlib import Path
+from omcp.utils import parse_sql
+
+# Struct fields of a converted range; accessing them yields a date, not a range
+_RANGE_FIELDS = frozenset({"start", "end"})
 
 
 def _create_datediff(left: exp.Expression, right: exp.Expression) -> exp.Expression:
@@ -185,6 +189,54 @@ def _is_range_overlap_operator(node: exp.Expression):
     return None
 
 
+def _looks_like_range(expr: exp.Expression) -> bool:
+    """Check if an operand of * looks like a range reference rather than a number."""
+    # Unwrap parentheses
+    if isinstance(expr, exp.Paren):
+        expr = expr.this
+
+    # Mul and Struct are definitely range operations
+    if isinstance(expr, (exp.Mul, exp.Struct)):
+        return True
+
+    # Dot expressions that access .start or .end are field accesses, not ranges
+    if isinstance(expr, exp.Dot):
+        field_name = expr.expression
+        if isinstance(field_name, exp.Identifier) and field_name.this in _RANGE_FIELDS:
+            return False
+        return True
+
+    # Column references - check if they're field accesses
+    if isinstance(expr, exp.Column):
+        # Check if this is a 3-level identifier like d2.dr.start
+        # which gets parsed as Column(this="start", table="dr", db="d2")
+        this = expr.this
+        if isinstance(this, exp.Identifier) and this.this in _RANGE_FIELDS:
+            # This is a field access, not a range
+            return False
+
+        # Check if we have a table identifier
+        table = expr.args.get("table")
+        if table and isinstance(table, exp.Identifier):
+            # Check if there's a db identifier too (3-level: db.table.column)
+            db = expr.args.get("db")
+            if db and isinstance(db, exp.Identifier):
+                # This is a 3-level identifier - check if it's a field access
+                if (
+                    this
+                    and isinstance(this, exp.Identifier)
+                    and this.this in _RANGE_FIELDS
+                ):
+                    return False
+            # 2-level identifier (table.column) is a range reference
+            return True
+
+        # Single identifier - could be a range
+        return True
+
+    return False
+
+
 def _is_range_intersection_operator(node: exp.Expression):
     """
     Check if node uses the * operator for range intersection (PostgreSQL).
@@ -199,56 +251,7 @@ def _is_range_intersection_operator(node: exp.Expression):
         right = node.expression
 
         # Check if both operands look like range references
-        def looks_like_range(expr):
-            # Unwrap parentheses
-            if isinstance(expr, exp.Paren):
-                expr = expr.this
-
-            # Mul and Struct are definitely range operations
-            if isinstance(expr, (exp.Mul, exp.Struct)):
-                return True
-
-            # Dot expressions that access .start or .end are field accesses, not ranges
-            if isinstance(expr, exp.Dot):
-                field_name = expr.expression
-                if isinstance(field_name, exp.Identifier) and field_name.this in (
-                    "start",
-                    "end",
-                ):
-                    return False
-                return True
-
-            # Column references - check if they're field accesses
-            if isinstance(expr, exp.Column):
-                # Check if this is a 3-level identifier like d2.dr.start
-                # which gets parsed as Column(this="start", table="dr", db="d2")
-                this = expr.this
-                if isinstance(this, exp.Identifier) and this.this in ("start", "end"):
-                    # This is a field access, not a range
-                    return False
-
-                # Check if we have a table identifier
-                table = expr.args.get("table")
-                if table and isinstance(table, exp.Identifier):
-                    # Check if there's a db identifier too (3-level: db.table.column)
-                    db = expr.args.get("db")
-                    if db and isinstance(db, exp.Identifier):
-                        # This is a 3-level identifier - check if it's a field access
-                        if (
-                            this
-                            and isinstance(this, exp.Identifier)
-                            and this.this in ("start", "end")
-                        ):
-                            return False
-                    # 2-level identifier (table.column) is a range reference
-                    return True
-
-                # Single identifier - could be a range
-                return True
-
-            return False
-
-        if looks_like_range(left) and looks_like_range(right):
+        if _looks_like_range(left) and _looks_like_range(right):
             return left, right
     return None
 
@@ -514,22 +517,25 @@ def _transform_date_operations(tree: exp.Expression) -> exp.Expression:
     # This ensures nested range operations are fully transformed
     max_iterations = 10
     for i in range(max_iterations):
-        old_sql = tree.sql()
-        tree = tree.transform(
+        new_tree = tree.transform(
             transformer
         )  # copy=True by default for proper transformation
-        new_sql = tree.sql()
-        if old_sql == new_sql:
+        # Structural comparison avoids regenerating SQL twice per pass
+        if new_tree == tree:
             break
+        tree = new_tree
     return tree
 
 
+@lru_cache(maxsize=1024)
 def transpile_query(
     sql: str, source_dialect: str = "postgres", target_dialect: str = "databricks"
 ) -> str:
     """
     Transpile a SQL query from one dialect to another.
 
+    Results are cached, as transpilation is a pure function of its arguments.
+
     Args:
         sql: The SQL query to transpile
         source_dialect: The source SQL dialect (default: "postgres")
@@ -539,8 +545,8 @@ def transpile_query(
         The transpiled SQL query
     """
     try:
-        # Parse the SQL
-        tree = sqlglot.parse_one(sql, read=source_dialect)
+        # Parse the SQL, reusing the tree the validator parsed
+        tree = parse_sql(sql, source_dialect)
 
         # Apply custom transformations for PostgreSQL -> Databricks
         if source_dialect == "postgres" and target_dialect == "databricks":
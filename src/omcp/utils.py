@@ -0,0 +1,103 @@
+"""Utility Module
+This module provides helpers shared across the OMCP modules
+"""
+
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+from functools import lru_cache
+
+import sqlglot as sg
+import sqlglot.expressions as exp
+
+
+@lru_cache(maxsize=512)
+def parse_sql(sql: str, dialect: t.Optional[str] = None) -> exp.Expression:
+    """
+    Parse a single SQL statement, caching the syntax tree.
+
+    The validator and the transpiler both parse each incoming query, so they
+    share one tree. Callers must not modify the returned tree in place;
+    sqlglot's transform() works on a copy by default.
+
+    Args:
+        sql (str): The SQL statement to parse.
+        dialect (str): The sqlglot dialect to read, or None for the default.
+
+    Returns:
+        exp.Expression: The parsed syntax tree.
+    """
+    return sg.parse_one(sql, read=dialect)
+
+
+class LRUCache:
+    """
+    A thread-safe, size-bounded least recently used cache.
+
+    Unlike functools.lru_cache on a method, the cache is stored on the instance
+    that owns it, so cached values are released together with that instance.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: t.Optional[float] = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept before the least
+                recently used entry is evicted.
+            ttl (float): Seconds after which an entry expires, or None to keep
+                entries until they are evicted.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Values are stored with the monotonic time at which they expire
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: t.Hashable, default: t.Any = None) -> t.Any:
+        """Return the cached value for key, or default if it is not cached."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            expires, value = self._data[key]
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: t.Hashable, value: t.Any):
+        now = time.monotonic()
+        expires = now + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                # Drop expired entries before evicting one that is still valid
+                self._purge_expired(now)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        """Return the number of entries that have not expired."""
+        with self._lock:
+            self._purge_expired(time.monotonic())
+            return len(self._data)
+
+    def _purge_expired(self, now: float):
+        """Remove expired entries. The lock must be held by the caller."""
+        if self.ttl is None:
+            return
+        expired = [
+            key
+            for key, (expires, _) in self._data.items()
+            if expires is not None and now >= expires
+        ]
+        for key in expired:
+            del self._data[key]
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._data.clear()
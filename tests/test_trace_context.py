@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+import omcp.trace_context as trace_context
+
+
+TRACEPARENT_A = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+TRACEPARENT_B = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+@pytest.fixture
+def context_file(tmp_path, monkeypatch):
+    """Point the trace context file at a temporary path with an empty cache"""
+    path = tmp_path / "trace_context.json"
+    monkeypatch.setattr(trace_context, "TRACE_CONTEXT_FILE", path)
+    monkeypatch.setattr(trace_context, "_cached_stat", None)
+    monkeypatch.setattr(trace_context, "_cached_context", None)
+    return path
+
+
+def test_missing_file(context_file):
+    """Test that a missing file gives an empty context"""
+    assert trace_context.read_trace_context()["traceparent"] is None
+
+
+def test_reads_traceparent(context_file):
+    """Test that the traceparent is read from the file"""
+    context_file.write_text(json.dumps({"traceparent": TRACEPARENT_A}))
+    assert trace_context.read_trace_context()["traceparent"] == TRACEPARENT_A
+
+
+def test_rewrite_with_same_size_and_mtime(context_file):
+    """Test that a rewrite is seen even if size and mtime do not change"""
+    context_file.write_text(json.dumps({"traceparent": TRACEPARENT_A}))
+    assert trace_context.read_trace_context()["traceparent"] == TRACEPARENT_A
+    stat = context_file.stat()
+
+    # Rewrite in place, then restore the mtime as a coarse filesystem would
+    with open(context_file, "w") as f:
+        f.write(json.dumps({"traceparent": TRACEPARENT_B}))
+    os.utime(context_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert context_file.stat().st_size == stat.st_size
+
+    assert trace_context.read_trace_context()["traceparent"] == TRACEPARENT_B
+
+
+def test_cached_context_is_a_copy(context_file):
+    """Test that callers cannot modify the cached context"""
+    context_file.write_text(json.dumps({"traceparent": TRACEPARENT_A}))
+    trace_context.read_trace_context()["traceparent"] = None
+    assert trace_context.read_trace_context()["traceparent"] == TRACEPARENT_A
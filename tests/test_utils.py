@@ -0,0 +1,113 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+import omcp.utils as utils
+from omcp.utils import LRUCache
+
+
+class FakeClock:
+    """A monotonic clock that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the monotonic clock used by the cache"""
+    fake = FakeClock()
+    monkeypatch.setattr(utils, "time", SimpleNamespace(monotonic=fake))
+    return fake
+
+
+def test_get_missing_key():
+    """Test that a missing key returns the default"""
+    cache = LRUCache()
+    assert cache.get("a") is None
+    assert cache.get("a", "default") == "default"
+
+
+def test_set_and_get():
+    """Test that a stored value is returned"""
+    cache = LRUCache()
+    cache["a"] = 1
+    assert cache.get("a") == 1
+    assert len(cache) == 1
+
+
+def test_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted when full"""
+    cache = LRUCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache.get("a")  # b is now the least recently used
+    cache["c"] = 3
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_entries_expire_after_ttl(clock):
+    """Test that entries are not returned once their TTL has passed"""
+    cache = LRUCache(ttl=10)
+    cache["a"] = 1
+    clock.now += 9
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+
+
+def test_len_excludes_expired_entries(clock):
+    """Test that len() agrees with get() after entries expire"""
+    cache = LRUCache(ttl=10)
+    cache["a"] = 1
+    clock.now += 5
+    cache["b"] = 2
+    clock.now += 5
+    assert len(cache) == 1
+    assert cache.get("b") == 2
+
+
+def test_expired_entries_evicted_before_valid_ones(clock):
+    """Test that a full cache drops expired entries before valid ones"""
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache["a"] = 1
+    clock.now += 5
+    cache["b"] = 2
+    cache.get("a")  # b is now the least recently used, but a expires first
+    clock.now += 5
+    cache["c"] = 3
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+
+
+def test_clear():
+    """Test that clear removes all entries"""
+    cache = LRUCache()
+    cache["a"] = 1
+    cache.clear()
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_concurrent_access():
+    """Test that concurrent writers never grow the cache beyond maxsize"""
+    cache = LRUCache(maxsize=50)
+
+    def write(offset):
+        for i in range(1000):
+            cache[offset + i] = i
+            cache.get(offset + i // 2)
+
+    threads = [threading.Thread(target=write, args=(n * 1000,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cache) == 50